@@ -0,0 +1,422 @@
+"""Helper functions for writing to terminals and files.
+
+Vendored and modernized from ``py.io.terminalwriter``, so the hot output
+paths can be maintained (and optimized) in pytest itself.
+"""
+import os
+import shutil
+import signal
+import sys
+import unicodedata
+from functools import lru_cache
+from io import StringIO
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Tuple
+
+
+def _read_terminal_width() -> int:
+    width, _ = shutil.get_terminal_size(fallback=(80, 24))
+
+    # The Windows get_terminal_size may be bogus, let's sanify a bit.
+    if width < 40:
+        width = 80
+
+    return width
+
+
+# shutil.get_terminal_size issues an ioctl per call, which adds up with one
+# sep() per section header.  Cache the width, keyed on the COLUMNS variable
+# (consulted first by shutil and monkeypatched by tests), and drop the cache
+# when the terminal is resized.
+_terminal_width_cache = {}  # type: Dict[Optional[str], int]
+_width_cache_enabled = False
+
+
+def _clear_terminal_width_cache(signum, frame):
+    _terminal_width_cache.clear()
+    if callable(_previous_sigwinch):
+        _previous_sigwinch(signum, frame)
+
+
+try:
+    _previous_sigwinch = signal.signal(signal.SIGWINCH, _clear_terminal_width_cache)
+except (AttributeError, ValueError, OSError):
+    # No SIGWINCH on this platform, or not the main thread: resizes would go
+    # unnoticed, so don't cache at all.
+    pass
+else:
+    _width_cache_enabled = True
+
+
+def get_terminal_width() -> int:
+    if not _width_cache_enabled:
+        return _read_terminal_width()
+    key = os.environ.get("COLUMNS")
+    width = _terminal_width_cache.get(key)
+    if width is None:
+        width = _terminal_width_cache[key] = _read_terminal_width()
+    return width
+
+
+# str.translate table deleting the BMP codepoints whose east-asian width is
+# Fullwidth or Wide (and which therefore take two terminal cells instead of
+# one).  Built lazily on the first non-ASCII width computation to keep it off
+# the import-time critical path.
+_wide_bmp_table = None  # type: Optional[Dict[int, None]]
+
+
+def _build_wide_bmp_table() -> "Dict[int, None]":
+    global _wide_bmp_table
+    east_asian_width = unicodedata.east_asian_width
+    _wide_bmp_table = {
+        cp: None for cp in range(0x10000) if east_asian_width(chr(cp)) in ("F", "W")
+    }
+    return _wide_bmp_table
+
+
+if sys.version_info >= (3, 7):
+
+    def _isascii(text: str) -> bool:
+        return text.isascii()
+
+
+else:
+
+    def _isascii(text: str) -> bool:
+        try:
+            text.encode("ascii")
+        except UnicodeEncodeError:
+            return False
+        return True
+
+
+def get_line_width(text: str) -> int:
+    # Fast path: pure-ASCII text (the overwhelmingly common case for pytest
+    # output) contains neither combining nor wide characters, so its width
+    # simply is its length -- no need to normalize or inspect each char.
+    if _isascii(text):
+        return len(text)
+    return _cached_line_width(text)
+
+
+# unicodedata.is_normalized is only available in Python 3.8+.
+_is_normalized = getattr(unicodedata, "is_normalized", None)
+
+
+# The same non-ASCII strings (status glyphs, progress fragments, repeated
+# test IDs) recur many times over a run, so cache widths per whole line.
+@lru_cache(maxsize=4096)
+def _cached_line_width(text: str) -> int:
+    # Even non-ASCII text is usually already in NFC form; the Quick-Check
+    # avoids rebuilding the string in that case.
+    if _is_normalized is None or not _is_normalized("NFC", text):
+        text = unicodedata.normalize("NFC", text)
+    # Deleting the wide characters with str.translate keeps the whole scan
+    # a single C-level pass; each deleted char accounts for one extra cell.
+    table = _wide_bmp_table or _build_wide_bmp_table()
+    width = 2 * len(text) - len(text.translate(table))
+    # The table only covers the BMP; supplementary-plane characters (rare)
+    # need a per-char correction.  They are present exactly when the UTF-16
+    # encoding needs surrogate pairs.  surrogatepass keeps lone surrogates
+    # (from surrogateescape-decoded paths and node IDs) from raising here.
+    if len(text.encode("utf-16-le", "surrogatepass")) != 2 * len(text):
+        width += sum(
+            1
+            for c in text
+            if c >= "\U00010000" and unicodedata.east_asian_width(c) in ("F", "W")
+        )
+    return width
+
+
+# The platform never changes within a process, no need to re-check it for
+# every writer.  Jython's os._name does not exist elsewhere, hence getattr.
+_JYTHON_ON_NT = sys.platform.startswith("java") and getattr(os, "_name", None) == "nt"
+
+
+def should_do_markup(file: TextIO) -> bool:
+    # The environment variables are read anew each call on purpose: they are
+    # monkeypatched at runtime by pytester and by tests.
+    environ = os.environ
+    py_colors = environ.get("PY_COLORS")
+    if py_colors == "1":
+        return True
+    if py_colors == "0":
+        return False
+    if "NO_COLOR" in environ:
+        return False
+    return (
+        not _JYTHON_ON_NT
+        and hasattr(file, "isatty")
+        and file.isatty()
+        and environ.get("TERM") != "dumb"
+    )
+
+
+# Cache of escape-code tuples to their combined ANSI prefix; only a handful
+# of distinct markup combinations ever occur in a run.
+_prefix_cache = {}  # type: Dict[Tuple[int, ...], str]
+
+
+_esctable = dict(
+    black=30,
+    red=31,
+    green=32,
+    yellow=33,
+    blue=34,
+    purple=35,
+    cyan=36,
+    white=37,
+    Black=40,
+    Red=41,
+    Green=42,
+    Yellow=43,
+    Blue=44,
+    Purple=45,
+    Cyan=46,
+    White=47,
+    bold=1,
+    light=2,
+    blink=5,
+    invert=7,
+)  # type: Dict[str, int]
+
+
+class TerminalWriter:
+    # Kept as a class attribute for backward compatibility; the methods
+    # below go through the module-level constant directly.
+    _esctable = _esctable
+
+    def __init__(
+        self,
+        file: Optional[TextIO] = None,
+        stringio: bool = False,
+        encoding: Optional[str] = None,
+    ) -> None:
+        if file is None:
+            if stringio:
+                self.stringio = file = StringIO()
+            else:
+                file = sys.stdout
+        if hasattr(file, "isatty") and file.isatty() and sys.platform == "win32":
+            try:
+                import colorama
+            except ImportError:
+                pass
+            else:
+                file = colorama.AnsiToWin32(file).stream
+                assert file is not None
+        self.encoding = encoding or getattr(file, "encoding", "utf-8")
+        self._file = file
+        self.hasmarkup = should_do_markup(file)
+        self._chars_on_current_line = 0
+        self._width_of_current_line = 0
+        self._terminal_width = None  # type: Optional[int]
+        # Resolved lazily on first use; stays None when pygments is not
+        # available.
+        self._highlighter = None  # type: Optional[_Highlighter]
+        self._highlighter_resolved = False
+
+    @property
+    def fullwidth(self) -> int:
+        if self._terminal_width is not None:
+            return self._terminal_width
+        return get_terminal_width()
+
+    @fullwidth.setter
+    def fullwidth(self, value: int) -> None:
+        self._terminal_width = value
+
+    @property
+    def chars_on_current_line(self) -> int:
+        """Return the number of characters written so far in the current line."""
+        return self._chars_on_current_line
+
+    @property
+    def width_of_current_line(self) -> int:
+        """Return an estimate of the width so far in the current line."""
+        return self._width_of_current_line
+
+    def _escaped(self, text: str, esc: "Tuple[int, ...]") -> str:
+        if not esc or not self.hasmarkup:
+            return text
+        prefix = _prefix_cache.get(esc)
+        if prefix is None:
+            # %d formats the int directly, without going through str().
+            prefix = "".join("\x1b[%dm" % cod for cod in esc)
+            _prefix_cache[esc] = prefix
+        return prefix + text + "\x1b[0m"
+
+    def markup(self, text: str, **kw: bool) -> str:
+        esctable = _esctable
+        if len(kw) == 1:
+            # Fast path for the dominant call shape, a single flag such as
+            # red=True: no list/tuple construction, no join.
+            [(name, on)] = kw.items()
+            code = esctable.get(name)
+            if code is None:
+                raise ValueError("unknown markup: {!r}".format(name))
+            if not on or not self.hasmarkup:
+                return text
+            return "\x1b[%dm%s\x1b[0m" % (code, text)
+        esc = []
+        for name in kw:
+            if name not in esctable:
+                raise ValueError("unknown markup: {!r}".format(name))
+            if kw[name]:
+                esc.append(esctable[name])
+        return self._escaped(text, tuple(esc))
+
+    def sep(
+        self,
+        sepchar: str,
+        title: Optional[str] = None,
+        fullwidth: Optional[int] = None,
+        **kw: bool
+    ) -> None:
+        if fullwidth is None:
+            fullwidth = self.fullwidth
+        # The goal is to have the line be as long as possible
+        # under the condition that len(line) <= fullwidth.
+        if sys.platform == "win32":
+            # If we print in the last column on windows we are on a
+            # new line but there is no way to verify/neutralize this
+            # (we may not know the exact line width).
+            # So let's be defensive to avoid empty lines in the output.
+            fullwidth -= 1
+        if title is not None:
+            # we want 2 + 2*len(fill) + len(title) <= fullwidth
+            # i.e.    2 + 2*len(sepchar)*N + len(title) <= fullwidth
+            #         2*len(sepchar)*N <= fullwidth - len(title) - 2
+            #         N <= (fullwidth - len(title) - 2) // (2*len(sepchar))
+            N = max((fullwidth - len(title) - 2) // (2 * len(sepchar)), 1)
+            fill = sepchar * N
+            parts = [fill, " ", title, " ", fill]
+            line_len = 2 * len(fill) + len(title) + 2
+        else:
+            # we want len(sepchar)*N <= fullwidth
+            # i.e.    N <= fullwidth // len(sepchar)
+            parts = [sepchar * (fullwidth // len(sepchar))]
+            line_len = len(parts[0])
+        # In some situations there is room for an extra sepchar at the right,
+        # in particular if we consider that with a sepchar like "_ " the
+        # trailing space is not important at the end of the line.
+        sepchar_stripped = sepchar.rstrip()
+        if line_len + len(sepchar_stripped) <= fullwidth:
+            parts.append(sepchar_stripped)
+
+        # Building the line with a single join keeps the number of
+        # intermediate strings down; sep() runs for every section header.
+        self.line("".join(parts), **kw)
+
+    def write(self, msg: str, **kw: bool) -> None:
+        if msg:
+            self._update_chars_on_current_line(msg)
+
+            if self.hasmarkup and kw:
+                msg = self.markup(msg, **kw)
+            self._write_raw(msg)
+
+    def _write_raw(self, msg: str) -> None:
+        try:
+            self._file.write(msg)
+        except UnicodeEncodeError:
+            # Some environments don't support printing general Unicode
+            # strings, due to misconfiguration or otherwise; in that case,
+            # print the string escaped to ASCII.
+            msg = msg.encode("unicode-escape").decode("ascii")
+            self._file.write(msg)
+        self._file.flush()
+
+    def _update_chars_on_current_line(self, text: str) -> None:
+        # A single rfind locates the newline (if any); slicing from there
+        # avoids the list allocation of rsplit and a second "\n" scan.
+        idx = text.rfind("\n")
+        if idx == -1:
+            self._chars_on_current_line += len(text)
+            self._width_of_current_line += get_line_width(text)
+        else:
+            current_line = text[idx + 1 :]
+            self._chars_on_current_line = len(current_line)
+            self._width_of_current_line = get_line_width(current_line)
+
+    def line(self, s: str = "", **kw: bool) -> None:
+        # Write the message and its newline in one go: a single underlying
+        # write and flush instead of two of each.
+        if s and self.hasmarkup and kw:
+            s = self.markup(s, **kw)
+        self._write_raw(s + "\n")
+        # The trailing newline always puts us at the start of a fresh line,
+        # no need to scan the message for it.
+        self._chars_on_current_line = 0
+        self._width_of_current_line = 0
+
+    def _write_source(self, lines: List[str], indents: Sequence[str] = ()) -> None:
+        """Write lines of source code possibly highlighted.
+
+        Keeping this private for now because the API is clunky. We should discuss how
+        to evolve the terminal writer so we can have more precise color support, for example
+        being able to write part of a line in one color and the rest in another, and so on.
+        """
+        if indents and len(indents) != len(lines):
+            raise ValueError(
+                "indents size ({}) should have same size as lines ({})".format(
+                    len(indents), len(lines)
+                )
+            )
+        if not lines:
+            return
+        if not indents:
+            indents = [""] * len(lines)
+        source = "\n".join(lines)
+        new_lines = self._highlight(source).splitlines()
+        # Emit everything in one write: a failure report routinely contains
+        # dozens of source lines and each line() would write and flush twice.
+        indented = [indent + line for indent, line in zip(indents, new_lines)]
+        if not indented:
+            # Highlighting e.g. [""] yields no lines; the old per-line loop
+            # wrote nothing in that case, so neither should we.
+            return
+        self.write("\n".join(indented) + "\n")
+
+    def _highlight(self, source: str) -> str:
+        """Highlight the given source code if we have markup support"""
+        # Highlighting blank source is a no-op, but would still pay the
+        # pygments invocation cost.
+        if not self.hasmarkup or not source or source.isspace():
+            return source
+        if not self._highlighter_resolved:
+            self._highlighter_resolved = True
+            self._highlighter = _get_highlighter()
+        highlighter = self._highlighter
+        if highlighter is None:
+            return source
+        highlight, lexer, formatter = highlighter
+        return highlight(source, lexer, formatter)
+
+
+# Cached (highlight, lexer, formatter) triple, or None if pygments is not
+# installed.  Importing pygments and constructing the lexer/formatter is
+# costly enough to matter when rendering many tracebacks, so do it once.
+_Highlighter = Tuple[Callable[..., str], object, object]
+_highlighter = None  # type: Optional[_Highlighter]
+_highlighter_resolved = False
+
+
+def _get_highlighter() -> "Optional[_Highlighter]":
+    global _highlighter, _highlighter_resolved
+    if not _highlighter_resolved:
+        _highlighter_resolved = True
+        try:
+            from pygments.formatters.terminal import TerminalFormatter
+            from pygments.lexers.python import PythonLexer
+            from pygments import highlight
+        except ImportError:
+            pass
+        else:
+            _highlighter = (highlight, PythonLexer(), TerminalFormatter(bg="dark"))
+    return _highlighter
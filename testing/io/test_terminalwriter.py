@@ -0,0 +1,96 @@
+import os
+import shutil
+import signal
+import sys
+from io import StringIO
+
+import pytest
+from _pytest._io import terminalwriter
+
+# On win32 sep() keeps the last column free to avoid wrapping (see sep()).
+win32 = int(sys.platform == "win32")
+
+
+def test_terminal_width_COLUMNS(monkeypatch) -> None:
+    monkeypatch.setattr(terminalwriter, "_terminal_width_cache", {})
+    monkeypatch.setenv("COLUMNS", "42")
+    assert terminalwriter.get_terminal_width() == 42
+
+
+def test_terminal_width_bogus(monkeypatch) -> None:
+    monkeypatch.setattr(terminalwriter, "_terminal_width_cache", {})
+    monkeypatch.setattr(shutil, "get_terminal_size", lambda fallback: (10, 10))
+    monkeypatch.delenv("COLUMNS", raising=False)
+    assert terminalwriter.get_terminal_width() == 80
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGWINCH"), reason="requires SIGWINCH")
+def test_terminal_width_cache_cleared_on_resize(monkeypatch) -> None:
+    monkeypatch.setattr(terminalwriter, "_terminal_width_cache", {})
+    monkeypatch.setenv("COLUMNS", "50")
+    assert terminalwriter.get_terminal_width() == 50
+    if terminalwriter._width_cache_enabled:
+        assert terminalwriter._terminal_width_cache
+        # signal.raise_signal is 3.8+, os.kill works everywhere we run.
+        os.kill(os.getpid(), signal.SIGWINCH)
+        assert not terminalwriter._terminal_width_cache
+
+
+def test_get_line_width() -> None:
+    assert terminalwriter.get_line_width("") == 0
+    assert terminalwriter.get_line_width("p") == 1
+    assert terminalwriter.get_line_width("p" * 10) == 10
+    # Wide chars take two cells.
+    assert terminalwriter.get_line_width("乇") == 2
+    # Combining characters are merged by NFC normalization first.
+    assert terminalwriter.get_line_width("à") == 1
+    assert terminalwriter.get_line_width("à") == 1
+    # Lone surrogates (surrogateescape-decoded non-UTF-8 paths and node IDs)
+    # must not raise and count as one cell each.
+    assert terminalwriter.get_line_width("file-\udcff-name") == 11
+
+
+def test_chars_and_width_on_current_line() -> None:
+    tw = terminalwriter.TerminalWriter(stringio=True)
+    tw.write("hello")
+    assert tw.chars_on_current_line == 5
+    assert tw.width_of_current_line == 5
+    tw.write(" 乇\n12")
+    assert tw.chars_on_current_line == 2
+    assert tw.width_of_current_line == 2
+    tw.line("34")
+    assert tw.chars_on_current_line == 0
+    assert tw.width_of_current_line == 0
+
+
+def test_markup() -> None:
+    tw = terminalwriter.TerminalWriter(stringio=True)
+    tw.hasmarkup = True
+    assert tw.markup("hello", red=True) == "\x1b[31mhello\x1b[0m"
+    assert tw.markup("hello", red=False) == "hello"
+    tw.hasmarkup = False
+    assert tw.markup("hello", red=True) == "hello"
+    with pytest.raises(ValueError):
+        tw.markup("x", wrong=True)
+
+
+def test_sep_no_title() -> None:
+    f = StringIO()
+    tw = terminalwriter.TerminalWriter(f)
+    tw.sep("-", fullwidth=60)
+    assert f.getvalue() == "-" * (60 - win32) + "\n"
+
+
+def test_sep_with_title() -> None:
+    f = StringIO()
+    tw = terminalwriter.TerminalWriter(f)
+    tw.sep("-", "hello", fullwidth=60 + win32)
+    assert f.getvalue() == "-" * 26 + " hello " + "-" * 26 + "-\n"
+
+
+def test_sep_longer_than_width() -> None:
+    f = StringIO()
+    tw = terminalwriter.TerminalWriter(f)
+    tw.sep("-", "xyz", fullwidth=4)
+    # The minimum is one sepchar on each side.
+    assert f.getvalue() == "- xyz -\n"